@@ -58,6 +58,12 @@ class Bot(ABC):
     def _init_bot_impl(self, mode:GameMode=GameMode.MJ4P):
         """ Initialize the bot before the game starts."""
 
+    def preprocess(self, msg:dict) -> dict:
+        """ canonicalize an input msg for this bot, called once where messages
+        enter the bot (before react/react_batch). Default is pass-through;
+        subclasses override for mode-specific rewrites."""
+        return msg
+
     @abstractmethod
     def react(self, input_msg:dict) -> dict | None:
         """ input mjai msg and get bot output if any, or None if not"""
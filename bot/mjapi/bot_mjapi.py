@@ -2,7 +2,11 @@
 
 """ Bot for mjapi"""
 
-import time
+import logging
+import threading
+import weakref
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, Future
 from common.settings import Settings
 from common.log_helper import LOGGER
 from common.utils import random_str
@@ -10,6 +14,83 @@ from common.mj_helper import MjaiType
 from bot.mjapi.mjapi import MjapiClient
 from bot.bot import Bot, GameMode
 
+# module-level aliases so the per-message batch loops load locals
+# instead of repeating MjaiType attribute lookups
+_START_KYOKU = MjaiType.START_KYOKU
+_NUKIDORA = MjaiType.NUKIDORA
+_KITA = MjaiType.KITA
+_REACH = MjaiType.REACH
+
+
+def _rewrite_start_kyoku(msg: dict) -> dict:
+    """ Trim 4p-shaped 'scores'/'tehais' arrays down to 3 entries.
+    Returns the original dict untouched when nothing needs trimming."""
+    trim_scores = len(msg.get('scores', ())) == 4
+    trim_tehais = len(msg.get('tehais', ())) == 4
+    if not (trim_scores or trim_tehais):
+        return msg
+    msg = msg.copy()
+    if trim_scores:
+        msg['scores'] = msg['scores'][:3]
+        LOGGER.debug("Trimmed 'scores' array to 3 elements for 3p mode.")
+    if trim_tehais:
+        msg['tehais'] = msg['tehais'][:3]
+        LOGGER.debug("Trimmed 'tehais' array to 3 elements for 3p mode.")
+    return msg
+
+
+def _rewrite_nukidora(msg: dict) -> dict:
+    """ Translate 'nukidora' to 'kita' for the API."""
+    msg = msg.copy()
+    msg['type'] = _KITA
+    LOGGER.debug("Translated 'nukidora' to 'kita' for 3p API compatibility.")
+    return msg
+
+
+# single dispatch table for all 3p message corrections, shared by the
+# single-message and batch paths. Rewriters return the original dict
+# when no change is needed, or a shallow-modified copy.
+_3P_REWRITERS = {
+    _START_KYOKU: _rewrite_start_kyoku,
+    _NUKIDORA: _rewrite_nukidora,
+}
+
+
+def _remote_cleanup(mjapi: MjapiClient, st: Settings, state: dict):
+    """
+    Network-side cleanup (stop bot, flush usage, optional logout).
+    Runs on a daemon thread with a short timeout so process exit
+    never stalls on the round-trips.
+    """
+    try:
+        mjapi.timeout = 2
+        if state.get('started'):
+            mjapi.stop_bot()
+        if mjapi.token:
+            st.mjapi_usage = mjapi.get_usage()
+            st.save_json()
+            if not st.mjapi_token:
+                mjapi.logout()
+    except Exception as e:
+        LOGGER.warning("MJAPI cleanup error: %s", e)
+
+
+def _close_remote(mjapi: MjapiClient, st: Settings, state: dict):
+    """
+    Finalizer callback: dispatches the network cleanup to a daemon thread
+    without blocking the caller (GC, atexit or an explicit close()).
+    Deliberately a module function so it holds no reference to the bot.
+    """
+    executor = state.get('executor')
+    if executor:
+        executor.shutdown(wait=False)
+    threading.Thread(
+        target=_remote_cleanup,
+        args=(mjapi, st, state),
+        name="MjapiCleanup",
+        daemon=True,
+    ).start()
+
 
 class BotMjapi(Bot):
     """
@@ -18,9 +99,9 @@ class BotMjapi(Bot):
     """
     # --- Class constants for configuration ---
     batch_size = 24  # The number of messages to send in a single batch request.
-    retries = 3  # The number of times to retry a failed API request.
-    retry_interval = 1  # The number of seconds to wait between retries.
     bound = 256  # The buffer size for message sequencing with the API.
+    # Retries live on the MjapiClient session adapter (urllib3 Retry),
+    # which backs off exponentially and honors Retry-After headers.
 
     def __init__(self, setting: Settings) -> None:
         """
@@ -34,6 +115,8 @@ class BotMjapi(Bot):
         # Choose login method based on available credentials
         if hasattr(self.st, 'mjapi_session_id') and self.st.mjapi_session_id:
             self._login_with_session()
+        elif self.st.mjapi_token:
+            self._login_with_token()
         else:
             self._login_or_reg()
 
@@ -42,9 +125,22 @@ class BotMjapi(Bot):
         self._supported_modes: list[GameMode] = []
         self.current_model_name: str = ""
         self.current_mode: GameMode | None = None  # Store the current game mode.
+        # Single-worker executor to pipeline non-final batches: the API can
+        # process batch N while the caller builds batch N+1. One worker keeps
+        # the wire order matching the seq order assigned at build time.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mjapi_batch")
+        self._pending: list[Future] = []
 
         self._configure_models()
 
+        # Explicit close() / GC / interpreter exit all funnel through one
+        # weakref finalizer, which hands the network cleanup to a daemon
+        # thread so shutdown never blocks on I/O.
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._close_state = {'started': False, 'executor': self._executor}
+        self._finalizer = weakref.finalize(self, _close_remote, self.mjapi, self.st, self._close_state)
+
     @property
     def supported_modes(self) -> list[GameMode]:
         """
@@ -83,6 +179,25 @@ class BotMjapi(Bot):
             self.st.save_json()
             LOGGER.info("Registered new user [%s] with MJAPI.", self.st.mjapi_user)
             self.mjapi.login(self.st.mjapi_user, self.st.mjapi_secret)
+        # Cache the token so the next run can skip the login round-trip.
+        self.st.mjapi_token = self.mjapi.token or ""
+
+    def _login_with_token(self):
+        """
+        Reuses the token cached from a previous run, skipping the login
+        round-trip. Falls back to normal login/registration if the service
+        no longer accepts the token.
+        """
+        LOGGER.debug("Reusing cached MJAPI token")
+        self.mjapi.login_with_session(self.st.mjapi_token)
+        try:
+            self.mjapi.list_models()    # cheap ping to validate the token
+        except Exception as e:
+            LOGGER.warning("Cached MJAPI token rejected (%s), logging in again", e)
+            self.st.mjapi_token = ""
+            self.mjapi.token = None
+            self.mjapi.headers.pop('Authorization', None)
+            self._login_or_reg()
 
     def _login_with_session(self):
         """
@@ -107,24 +222,29 @@ class BotMjapi(Bot):
         # Store all models in settings for user selection in a UI.
         self.st.mjapi_models = all_models
 
-        # Filter models into 3-player and 4-player categories based on their names.
-        models_3p = [m for m in all_models if "3p" in m]
-        models_4p = [m for m in all_models if "4p" in m]
+        # Filter models into 3-player and 4-player categories based on their
+        # names, in a single pass over the list.
+        models_3p, models_4p = [], []
+        for m in all_models:
+            if "3p" in m:
+                models_3p.append(m)
+            if "4p" in m:
+                models_4p.append(m)
 
-        LOGGER.info(f"Available MJAPI models: 4p={models_4p}, 3p={models_3p}")
+        LOGGER.info("Available MJAPI models: 4p=%s, 3p=%s", models_4p, models_3p)
 
         # Validate 4-player model selection.
         if models_4p:
             if self.st.mjapi_model_select_4p not in models_4p:
                 self.st.mjapi_model_select_4p = models_4p[0]  # Default to the first available 4p model.
-                LOGGER.warning(f"Selected 4p model not found. Defaulting to {self.st.mjapi_model_select_4p}")
+                LOGGER.warning("Selected 4p model not found. Defaulting to %s", self.st.mjapi_model_select_4p)
             self._supported_modes.append(GameMode.MJ4P)  # Add 4P to supported modes.
 
         # Validate 3-player model selection.
         if models_3p:
             if self.st.mjapi_model_select_3p not in models_3p:
                 self.st.mjapi_model_select_3p = models_3p[0]  # Default to the first available 3p model.
-                LOGGER.warning(f"Selected 3p model not found. Defaulting to {self.st.mjapi_model_select_3p}")
+                LOGGER.warning("Selected 3p model not found. Defaulting to %s", self.st.mjapi_model_select_3p)
             self._supported_modes.append(GameMode.MJ3P)  # Add 3P to supported modes.
 
         # Update API usage and save any changes to settings.
@@ -135,17 +255,28 @@ class BotMjapi(Bot):
             self._supported_modes
         )
 
+    def close(self):
+        """
+        Explicit non-blocking shutdown. Safe to call multiple times; the
+        network cleanup (stop bot, flush usage, optional logout) runs on a
+        daemon thread so the caller never stalls. With a cached token the
+        cleanup deliberately skips logout: staying logged in is what makes
+        token reuse possible.
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        LOGGER.debug("Closing bot %s", self.name)
+        self._finalizer()   # runs _close_remote at most once
+
     def __del__(self):
         """
-        Destructor to ensure clean shutdown, stopping the bot and logging out.
+        Destructor: delegates to close() so GC never blocks on network I/O.
         """
-        LOGGER.debug("Deleting bot %s", self.name)
-        if self.initialized:  # If a game was started...
-            self.mjapi.stop_bot()  # ...ensure the bot is stopped on the server.
-        if self.mjapi.token:  # If we were logged in...
-            self.st.mjapi_usage = self.mjapi.get_usage()  # ...update final usage count.
-            self.st.save_json()  # ...save settings.
-            self.mjapi.logout()  # ...and log out.
+        if getattr(self, '_close_lock', None) is None:
+            return      # __init__ failed before the close machinery was set up
+        self.close()
 
     def _init_bot_impl(self, mode: GameMode = GameMode.MJ4P):
         """
@@ -164,38 +295,20 @@ class BotMjapi(Bot):
         self.current_model_name = model_to_use
         LOGGER.info(f"Starting MJAPI bot for {mode.name} using model: {self.current_model_name}")
         self.mjapi.start_bot(self.seat, BotMjapi.bound, self.current_model_name)
+        self._close_state['started'] = True     # cleanup must stop the server-side bot
         self.id = -1
 
-    def _preprocess_for_3p(self, msg: dict) -> dict:
+    def preprocess(self, msg: dict) -> dict:
         """
-        Corrects message formats for 3-player games before sending to the API.
-        Specifically, it trims 'scores' and 'tehais' arrays in 'start_kyoku' events.
+        Corrects message formats for 3-player games before they enter the bot,
+        using the shared _3P_REWRITERS dispatch table. Called once at ingestion
+        so react/react_batch can assume canonical messages.
         """
         # We only need to act if we are in a 3-player game.
         if self.current_mode != GameMode.MJ3P:
             return msg
-
-        # Check if this is the message that needs correcting.
-        if msg.get('type') == MjaiType.START_KYOKU:
-            LOGGER.debug(f"Preprocessing 3p start_kyoku message. Original scores length: {len(msg.get('scores', []))}")
-            
-            # Create a shallow copy to avoid modifying the original data structure.
-            msg_copy = msg.copy()
-            
-            # If 'scores' exists and has 4 elements, trim it to 3.
-            if 'scores' in msg_copy and len(msg_copy['scores']) == 4:
-                msg_copy['scores'] = msg_copy['scores'][:3]
-                LOGGER.info("Trimmed 'scores' array to 3 elements for 3p mode.")
-            
-            # If 'tehais' exists and has 4 elements, trim it to 3.
-            if 'tehais' in msg_copy and len(msg_copy['tehais']) == 4:
-                msg_copy['tehais'] = msg_copy['tehais'][:3]
-                LOGGER.info("Trimmed 'tehais' array to 3 elements for 3p mode.")
-            
-            return msg_copy
-
-        # For all other message types, return the original message.
-        return msg
+        rewriter = _3P_REWRITERS.get(msg.get('type'))
+        return rewriter(msg) if rewriter else msg
 
     def _process_reaction(self, reaction, recurse):
         """
@@ -212,9 +325,9 @@ class BotMjapi(Bot):
 
         if (reaction and isinstance(reaction, dict) and
                 self.current_mode == GameMode.MJ3P and
-                reaction.get('type') == MjaiType.KITA):
+                reaction.get('type') == _KITA):
             reaction = reaction.copy()
-            reaction['type'] = MjaiType.NUKIDORA
+            reaction['type'] = _NUKIDORA
             LOGGER.info("Converted API 'kita' response back to 'nukidora' for 3p mode.")
 
         # Robust check for a valid Mjai action
@@ -222,9 +335,9 @@ class BotMjapi(Bot):
             return None
 
         # Process self reach: if the bot declares reach, we immediately ask it what to discard.
-        if recurse and reaction['type'] == MjaiType.REACH and reaction['actor'] == self.seat:
+        if recurse and reaction['type'] == _REACH and reaction['actor'] == self.seat:
             LOGGER.debug("Send reach msg to get reach_dahai.")
-            reach_msg = {'type': MjaiType.REACH, 'actor': self.seat}
+            reach_msg = {'type': _REACH, 'actor': self.seat}
             # Make the recursive call to get the discard action following the reach.
             reach_dahai = self.react(reach_msg, recurse=False)
             # Embed the discard action into the original reach action.
@@ -237,103 +350,111 @@ class BotMjapi(Bot):
     def react(self, input_msg: dict, recurse=True) -> dict | None:
         msg_type = input_msg['type']
         if self.ignore_next_turn_self_reach:
-            if msg_type == MjaiType.REACH and input_msg['actor'] == self.seat:
+            if msg_type == _REACH and input_msg['actor'] == self.seat:
                 LOGGER.debug("Ignoring repetitive self reach msg")
                 return None
             self.ignore_next_turn_self_reach = False
 
         old_id = self.id
-        err = None
         self.id = (self.id + 1) % BotMjapi.bound
-        reaction = None
-        for _ in range(BotMjapi.retries):
-            try:
-                reaction = self.mjapi.act(self.id, input_msg)
-                err = None
-                break
-            except Exception as e:
-                err = e
-                time.sleep(BotMjapi.retry_interval)
-        if err:
+        try:
+            # the session adapter retries transient failures; only
+            # terminal errors reach this point
+            reaction = self.mjapi.act(self.id, input_msg)
+        except Exception:
             self.id = old_id
-            raise err
+            raise
         return self._process_reaction(reaction, recurse)
 
     def react_batch(self, input_list: list[dict]) -> dict | None:
+        skip_first = False
         if self.ignore_next_turn_self_reach and len(input_list) > 0:
-            if input_list[0]['type'] == MjaiType.REACH and input_list[0]['actor'] == self.seat:
+            first = input_list[0]
+            if first['type'] == _REACH and first['actor'] == self.seat:
                 LOGGER.debug("Ignoring repetitive self reach msg")
-                input_list = input_list[1:]
+                skip_first = True
             self.ignore_next_turn_self_reach = False
-        if len(input_list) == 0:
+        remaining = len(input_list) - skip_first
+        if remaining == 0:
             return None
-        num_batches = (len(input_list) - 1) // BotMjapi.batch_size + 1
+        # Chunk through an iterator: no sub-list slices, the repetitive
+        # reach msg is skipped in O(1), and the final batch is simply the
+        # one that exhausts the remaining count.
+        it = iter(input_list)
+        if skip_first:
+            next(it)
+        batch_size = BotMjapi.batch_size
         reaction = None
-        for (i, start) in enumerate(range(0, len(input_list), BotMjapi.batch_size)):
+        while remaining:
+            take = min(batch_size, remaining)
+            remaining -= take
             reaction = self._react_batch_impl(
-                input_list[start:start + BotMjapi.batch_size],
-                can_act=i + 1 == num_batches)
+                list(islice(it, take)),
+                can_act=remaining == 0)
         return reaction
 
+    def _build_batch(self, input_list: list[dict], can_act: bool) -> list[dict]:
+        """
+        Builds the batch actions from already-canonicalized messages
+        (3p corrections happen in preprocess() at ingestion), so this loop
+        is mode-agnostic and passes messages through without copying.
+        """
+        batch_data = []
+        bound = BotMjapi.bound
+        last = len(input_list) - 1
+        _id = self.id       # keep the counter in a local inside the loop
+        for (i, msg) in enumerate(input_list):
+            _id = (_id + 1) % bound
+            if i == last and not can_act:
+                # Copy only when a field must be set, to keep the caller's dict intact.
+                msg = msg.copy()
+                msg['can_act'] = False
+            batch_data.append({'seq': _id, 'data': msg})
+        self.id = _id
+        return batch_data
+
+    def _send_batch(self, batch_data: list[dict]) -> dict | None:
+        """
+        Sends one prepared batch to the API. Transient failures are retried
+        by the session adapter; terminal errors propagate.
+        """
+        # Log the data we are about to send for final verification.
+        # Guarded so the giant batch repr is not built unless DEBUG is on.
+        if self.current_mode == GameMode.MJ3P and LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("Sending to 3p API: %s", batch_data)
+        return self.mjapi.batch(batch_data)
+
+    def _drain_pending(self):
+        """
+        Waits for all pipelined batches to finish, surfacing the first error.
+        """
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
     def _react_batch_impl(self, input_list, can_act):
         """
         Helper function to process a single batch of actions and send it to the API.
-        Includes direct pre-processing for 3p games.
+        Non-final batches are submitted asynchronously: their reactions are
+        discarded anyway, so the API can process them while the caller builds
+        the next batch. Only the final batch is awaited.
         """
         if len(input_list) == 0:
             return None
-            
-        batch_data = []
+
         old_id = self.id
-        err = None
-
-        # Iterate over the input messages to prepare them for the batch request.
-        for (i, original_msg) in enumerate(input_list):
-            self.id = (self.id + 1) % BotMjapi.bound
-            
-            # Make a copy so we don't alter the original log data.
-            msg = original_msg.copy()
-            
-            # Perform pre-processing specific to 3-player mode
-            if self.current_mode == GameMode.MJ3P:
-                msg_type = msg.get('type')
-                # Rule 1: Trim arrays in start_kyoku message.
-                if msg_type == MjaiType.START_KYOKU:
-                    if 'scores' in msg and len(msg['scores']) == 4:
-                        msg['scores'] = msg['scores'][:3]
-                        LOGGER.info("Trimmed 'scores' array to 3 elements for 3p mode.")
-                    if 'tehais' in msg and len(msg['tehais']) == 4:
-                        msg['tehais'] = msg['tehais'][:3]
-                        LOGGER.info("Trimmed 'tehais' array to 3 elements for 3p mode.")
-                
-                # Rule 2: Translate 'nukidora' to 'kita' for the API
-                elif msg_type == MjaiType.NUKIDORA:
-                    msg['type'] = MjaiType.KITA
-                    LOGGER.info("Translated 'nukidora' to 'kita' for 3p API compatibility.")
-
-            # If this is not the last batch, the bot cannot act on this message.
-            if i + 1 == len(input_list) and not can_act:
-                msg['can_act'] = False
-            
-            # Format the message for the API.
-            action = {'seq': self.id, 'data': msg}
-            batch_data.append(action)
+        batch_data = self._build_batch(input_list, can_act)
 
-        reaction = None
-        for _ in range(BotMjapi.retries):
-            try:
-                # Log the data we are about to send for final verification
-                if self.current_mode == GameMode.MJ3P:
-                    LOGGER.debug(f"Sending to 3p API: {batch_data}")
-                reaction = self.mjapi.batch(batch_data)
-                err = None
-                break
-            except Exception as e:
-                err = e
-                time.sleep(BotMjapi.retry_interval)
-
-        if err:
+        if not can_act:
+            # seq ids are already assigned; let the batch travel in the background.
+            self._pending.append(self._executor.submit(self._send_batch, batch_data))
+            return None
+
+        try:
+            self._drain_pending()
+            reaction = self._send_batch(batch_data)
+        except Exception:
             self.id = old_id
-            raise err
-            
+            raise
+
         return self._process_reaction(reaction, True)
\ No newline at end of file
@@ -3,7 +3,20 @@ API 文档: https://pastebin.com/wks80EsZ
 密码: EaSXeZycr4
 把文档内容粘贴到测试网址: https://editor.swagger.io/"""
 
+import json as _json
 import requests
+from requests.adapters import HTTPAdapter, Retry
+
+# orjson serializes the dict-heavy mjai payloads several times faster than
+# the stdlib encoder; fall back to stdlib json when it is not installed
+try:
+    import orjson
+    _dumps = orjson.dumps           # returns bytes
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return _json.dumps(obj).encode('utf-8')
+    _loads = _json.loads
 
 class MjapiClient:
     """ MJAPI API wrapper"""
@@ -11,7 +24,19 @@ class MjapiClient:
         self.base_url = base_url
         self.timeout = timeout
         self.token:str = None
-        self.headers = {}
+        self.headers = {'Content-Type': 'application/json'}     # bodies are pre-serialized
+        # pooled session so act/batch calls reuse one keep-alive connection.
+        # retries happen at the adapter level: urllib3 distinguishes connect
+        # from read errors, honors Retry-After on 429/503 and backs off
+        # exponentially, so callers need no retry loop of their own
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=4, pool_maxsize=8,
+            max_retries=Retry(
+                total=3, backoff_factor=0.3,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=['POST', 'GET'],
+                respect_retry_after_header=True)))
 
     def set_bearer_token(self, token):
         """Set the bearer token for authentication."""
@@ -22,7 +47,8 @@ class MjapiClient:
         """ send POST to API and process response"""
         try:
             full_url = f'{self.base_url}{path}'
-            res = requests.post(full_url, json=json, headers=self.headers, timeout=self.timeout)
+            body = _dumps(json) if json is not None else None
+            res = self._session.post(full_url, data=body, headers=self.headers, timeout=self.timeout)
             return self._process_res(res, raise_error)
         except requests.RequestException as e:
             if raise_error:
@@ -34,7 +60,7 @@ class MjapiClient:
         """ send GET to API and process response"""
         try:
             full_url = f'{self.base_url}{path}'
-            res = requests.get(full_url, headers=self.headers, timeout=self.timeout)
+            res = self._session.get(full_url, headers=self.headers, timeout=self.timeout)
             return self._process_res(res, raise_error)
         except requests.RequestException as e:
             if raise_error:
@@ -43,14 +69,15 @@ class MjapiClient:
                 return None
         
     def _process_res(self, res:requests.Response, raise_error:bool):
-        """ return results or raise error"""            
+        """ return results or raise error"""
         if res.ok:
-            return res.json() if res.content else None
-        elif 'error' in res.json():
-            message = res.json()['error']
+            return _loads(res.content) if res.content else None
+        res_json = _loads(res.content) if res.content else {}
+        if 'error' in res_json:
+            message = res_json['error']
             if raise_error:
                 raise RuntimeError(f"Error in response {res.status_code}: {message}")
-            return res.json()
+            return res_json
         else:
             raise RuntimeError(f"Unexpected API response {res.status_code}: {res.text}")
         
@@ -63,16 +90,16 @@ class MjapiClient:
         res_json = self.post_req(path, json=data)
         return res_json
 
-    # def login(self, code):
-    #     """Login with trial code. save token if success. otherwise raise error """
-    #     path = '/user/trial'
-    #     data = {'code': code}
-    #     res_json = self.post_req(path, json=data)
-    #     if 'id' in res_json:
-    #         self.token = res_json['id']
-    #         self.set_bearer_token(self.token)
-    #     else:
-    #         raise RuntimeError(f"Error login: {res_json}")
+    def login(self, name, secret):
+        """Login with name and secret. save token if success. otherwise raise error"""
+        path = '/user/login'
+        data = {'name': name, 'secret': secret}
+        res_json = self.post_req(path, json=data)
+        if 'id' in res_json:
+            self.token = res_json['id']
+            self.set_bearer_token(self.token)
+        else:
+            raise RuntimeError(f"Error login: {res_json}")
 
     def login_with_session(self, session_id):
         """Login using an existing session ID. Directly set bearer token."""
@@ -87,11 +114,11 @@ class MjapiClient:
         res_json = self.get_req(path)
         return res_json
 
-    # def logout(self):
-    #     """Logout the current user."""
-    #     path = '/user/logout'
-    #     res_json = self.post_req(path)
-    #     return res_json
+    def logout(self):
+        """Logout the current user."""
+        path = '/user/logout'
+        res_json = self.post_req(path)
+        return res_json
 
     def list_models(self) -> list[str]:
         """Return list of available models."""
@@ -134,9 +161,9 @@ class MjapiClient:
 
     def _post_act(self, path, _seq, actions):
         # post request to MJAPI and process response/errors
-        response = requests.post(self.base_url + path, json=actions, headers=self.headers, timeout=self.timeout)
+        response = self._session.post(self.base_url + path, data=_dumps(actions), headers=self.headers, timeout=self.timeout)
         if response.content:
-            response_json = response.json()
+            response_json = _loads(response.content)
             if response.status_code == 200:
                 if 'act' in response_json:
                     # assume seq is correct
@@ -1,6 +1,7 @@
 """ Settings file and options """
 
 import json
+import threading
 from typing import Callable
 from .log_helper import LOGGER
 from .lan_str import LanStr, LAN_OPTIONS
@@ -12,7 +13,8 @@ class Settings:
     """ Settings class to load and save settings to json file"""
     def __init__(self, json_file:str=DEFAULT_SETTING_FILE) -> None:
         self._json_file = json_file
-        self._settings_dict:dict = self.load_json()        
+        self._save_lock = threading.Lock()      # save_json is called from multiple threads
+        self._settings_dict:dict = self.load_json()
 
         # 然后读取各个设置项，包括mjapi_session_id
         self.mjapi_session_id: str = self._get_value("mjapi_session_id", "")
@@ -45,6 +47,7 @@ class Settings:
         self.mjapi_url:str = self._get_value("mjapi_url", "https://mjai.7xcnnw11phu.eu.org", self.valid_url)
         self.mjapi_user:str = self._get_value("mjapi_user", "")
         self.mjapi_secret:str = self._get_value("mjapi_secret", "")
+        self.mjapi_token:str = self._get_value("mjapi_token", "")  # cached login token, reused across runs
         self.mjapi_models:list = self._get_value("mjapi_models",[])
         self.mjapi_model_select_4p: str = self._get_value("mjapi_model_select_4p", "4p-finetuned-b1")
         self.mjapi_model_select_3p: str = self._get_value("mjapi_model_select_3p", "3p-beta-4")
@@ -82,12 +85,13 @@ class Settings:
         return settings_dict
     
     def save_json(self):
-        """ Save settings into json file"""
+        """ Save settings into json file (thread-safe)"""
         # save all non-private variables (not starting with "_") into dict
-        settings_to_save = {key: value for key, value in self.__dict__.items()
-                            if not key.startswith('_') and not callable(value)}
-        with open(self._json_file, 'w', encoding='utf-8') as file:
-            json.dump(settings_to_save, file, indent=4, separators=(', ', ': '))
+        with self._save_lock:
+            settings_to_save = {key: value for key, value in self.__dict__.items()
+                                if not key.startswith('_') and not callable(value)}
+            with open(self._json_file, 'w', encoding='utf-8') as file:
+                json.dump(settings_to_save, file, indent=4, separators=(', ', ': '))
     
     def _get_value(self, key:str, default_value:any, validator:Callable[[any],bool]=None) -> any:
         """ Get value from settings dictionary, or return default_value if error"""
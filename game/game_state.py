@@ -600,12 +600,14 @@ class GameState:
             if 'operation' not in data or 'operationList' not in data['operation'] or len(data['operation']['operationList']) == 0:
                 return None
         try:
-            if len(self.mjai_pending_input_msgs) == 1:
-                LOGGER.info("Bot in: %s", self.mjai_pending_input_msgs[0])
-                output_reaction = self.mjai_bot.react(self.mjai_pending_input_msgs[0])
+            # canonicalize messages once at ingestion (e.g. 3p rewrites for MJAPI bot)
+            input_msgs = [self.mjai_bot.preprocess(m) for m in self.mjai_pending_input_msgs]
+            if len(input_msgs) == 1:
+                LOGGER.info("Bot in: %s", input_msgs[0])
+                output_reaction = self.mjai_bot.react(input_msgs[0])
             else:
-                LOGGER.info("Bot in (batch):\n%s", '\n'.join(str(m) for m in self.mjai_pending_input_msgs))
-                output_reaction = self.mjai_bot.react_batch(self.mjai_pending_input_msgs)
+                LOGGER.info("Bot in (batch):\n%s", '\n'.join(str(m) for m in input_msgs))
+                output_reaction = self.mjai_bot.react_batch(input_msgs)
         except Exception as e:
             LOGGER.error("Bot react error: %s", e, exc_info=True)
             output_reaction = None
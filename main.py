@@ -16,6 +16,8 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import threading
+
 from gui.main_gui import MainGUI
 from common import utils
 from common.log_helper import LogHelper
@@ -23,14 +25,32 @@ from common.settings import Settings
 from bot_manager import BotManager
 from mjapi import mjapi
 
+def fetch_trial_session(setting:Settings):
+    """ fetch MJAPI trial session id and save it to settings.
+    Run on a background thread so startup does not block on the network;
+    the MJAPI bot falls back to its cached-token/login flow until the
+    session id arrives."""
+    session_id = mjapi()
+    if session_id:
+        setting.mjapi_session_id = session_id
+        setting.save_json()
+
 def main():
     """ Main entry point """
     LogHelper.config_logging()
-    session_id = mjapi()
     setting = Settings()
-    if session_id:
-        setting.mjapi_session_id = session_id
+    # Drop any trial session persisted by a previous run before the fetch
+    # starts: a bot created while the fetch is in flight must fall back to
+    # its cached-token/login flow rather than log in with a stale id.
+    if setting.mjapi_session_id:
+        setting.mjapi_session_id = ""
         setting.save_json()
+    threading.Thread(
+        name="TrialSession",
+        target=fetch_trial_session,
+        args=(setting,),
+        daemon=True
+    ).start()
 
     # utils.set_dpi_awareness()
     utils.prevent_sleep()
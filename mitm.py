@@ -37,9 +37,13 @@ class WSDataInterceptor:
             self.allowed_domains = allowed_domains
         else:
             self.allowed_domains = None
-        self.message_queue = queue.Queue()      
+        self.message_queue = queue.Queue()
         """Queue for unretrieved messages
         each element is: WSMessage"""
+        self._allowed_flows:set = set()
+        """flow ids that passed the domain filter. websocket_message fires for
+        every frame, so the per-frame check is a set lookup instead of
+        rebuilding and scanning the url each time"""
         
     def allow_url(self, url:str) -> bool:
         """ return true if url is allowed"""
@@ -54,23 +58,25 @@ class WSDataInterceptor:
         return False
 
     def websocket_start(self, flow:HTTPFlow):
-        """ ws start handler"""
+        """ ws start handler: decide the domain filter once per flow"""
         if self.allow_url(flow.request.pretty_url):
+            self._allowed_flows.add(flow.id)
             self.message_queue.put(WSMessage(flow.id, flow.timestamp_start, None, WsType.START))
         else:
             flow.kill()
-            LOGGER.info("Killing flow since it is not in allowed domains: %s", flow.request.pretty_url)            
-        
+            LOGGER.info("Killing flow since it is not in allowed domains: %s", flow.request.pretty_url)
+
     def websocket_message(self, flow:HTTPFlow):
-        """ ws message handler"""
-        msg = flow.websocket.messages[-1]
-        if self.allow_url(flow.request.pretty_url):
+        """ ws message handler: runs for every frame, keep it lean"""
+        if flow.id in self._allowed_flows:
+            msg = flow.websocket.messages[-1]
             self.message_queue.put(WSMessage(flow.id, msg.timestamp, msg.content))
-        
+
     def websocket_end(self, flow:HTTPFlow):
         """ ws flow end handler"""
-        if self.allow_url(flow.request.pretty_url):
-            self.message_queue.put(WSMessage(flow.id, flow.timestamp_start, None, WsType.END))        
+        if flow.id in self._allowed_flows:
+            self._allowed_flows.discard(flow.id)
+            self.message_queue.put(WSMessage(flow.id, flow.timestamp_start, None, WsType.END))
 
     def replace_next_msg(self):
         pass
@@ -1,15 +1,23 @@
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import logging
 
 LOGGER = logging.getLogger(__name__)
 
+# shared session so repeat calls reuse one keep-alive connection
+# instead of paying TCP+TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.3)))
+
 def mjapi() -> str:
     url = "https://mjai.7xcnnw11phu.eu.org/user/trial"
     payload = {"code": "FREE_TRIAL_SPONSORED_BY_MJAPI_DiscordID_9ns4esyx"}
     headers = {"Content-Type": "application/json", "Accept": "application/json"}
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        response = _SESSION.post(url, json=payload, headers=headers, timeout=10)
         response.raise_for_status()
         session_id = response.json().get("id")
         print(session_id)
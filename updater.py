@@ -8,6 +8,7 @@ import shutil
 import zipfile
 from enum import Enum,auto
 import requests
+from requests.adapters import HTTPAdapter, Retry
 
 from common.utils import Folder, WEBSITE
 import common.utils as utils
@@ -17,6 +18,13 @@ VERSION_FILE = "version"
 UPDATE_FILE = "MahjongCopilot.zip"
 HELP_PATH = r"/help"
 
+# shared session: version check / help / download hit the same host,
+# so reuse one keep-alive connection instead of a fresh TLS handshake per call
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.3)))
+
 """ how to release update:
 - Use Pyinstaller to pack to executables.
 - select main executable and files needed (like resources folder), zip into archive
@@ -57,6 +65,11 @@ class Updater:
         
         self.help_html:str = None       # help html text from web
         self.help_exception:Exception = None
+
+        # ETag cache: repeat checks send If-None-Match and reuse the cached
+        # body on 304 instead of re-downloading unchanged resources
+        self._etags:dict = {}           # url -> ETag of cached body
+        self._etag_bodies:dict = {}     # url -> cached response text
         
     
     def load_help(self):
@@ -79,17 +92,30 @@ class Updater:
         ).start()
         
     
+    def _get_cached(self, url:str, timeout:float) -> str:
+        """ GET with If-None-Match: returns the cached body on 304,
+        so unchanged resources cost a tiny conditional request only"""
+        headers = {}
+        etag = self._etags.get(url)
+        if etag:
+            headers['If-None-Match'] = etag
+        res = _SESSION.get(url, headers=headers, timeout=timeout)
+        if res.status_code == 304:
+            return self._etag_bodies[url]
+        res.raise_for_status()
+        new_etag = res.headers.get('ETag')
+        if new_etag:
+            self._etags[url] = new_etag
+            self._etag_bodies[url] = res.text
+        return res.text
+
+
     def get_html(self, url:str) -> str:
         """ get html text from url, and process it"""
         try:
-            self.help_exception = None        
-            response = requests.get(url, timeout=15) # Send a GET request to the URL
-            # Check if the request was successful (HTTP status code 200)
-            if response.status_code != 200:
-                response.raise_for_status()
-            
+            self.help_exception = None
             # process text: remove/replace some tags
-            res_text = response.text
+            res_text = self._get_cached(url, 15)
             rm_patterns = [
                 r'<script[^>]*>.*?</script>',
                 r'<meta[^>]*>',
@@ -117,8 +143,7 @@ class Updater:
         def check_ver():
             try:
                 self.update_status = UpdateStatus.CHECKING
-                res = requests.get(self.urlbase + VERSION_FILE, timeout=10)
-                self.web_version = res.text
+                self.web_version = self._get_cached(self.urlbase + VERSION_FILE, 10)
                 LOGGER.debug("Check update: Local version=%s, Web version=%s", self.local_version, self.web_version)
                 if self.is_webversion_newer():
                     self.update_status = UpdateStatus.NEW_VERSION
@@ -157,7 +182,7 @@ class Updater:
         returns:
             str: downloaded file path"""        
         save_file = utils.sub_file(Folder.TEMP, fname)
-        with requests.get(self.urlbase + fname, stream=True, timeout=self.timeout_dl) as res:
+        with _SESSION.get(self.urlbase + fname, stream=True, timeout=self.timeout_dl) as res:
             res.raise_for_status()
             total_length = int(res.headers.get('content-length', 0))
             downloaded = 0